@@ -3,13 +3,13 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from streamlit_gsheets import GSheetsConnection
-from sklearn.neighbors import NearestNeighbors
 from sklearn.decomposition import PCA
 from sklearn.preprocessing import StandardScaler
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 import re
-from collections import Counter
 
 # -----------------------------------------------------------------------------
 # 1. 설정 및 초기화
@@ -34,65 +34,173 @@ COLS_ACTIVITIES = ['경험명', '유형', '내용', 'nAch(성취)', 'nPow(권력
 COLS_BOOKS = ['경험명', '통합적복잡성', '의미부여']
 COLS_QUESTIONS = ['문항', '소재', '내용'] 
 
+# 키워드 추출용 정규식 (두 글자 이상 단어) 및 불용어
+WORD_RE = re.compile(r'\w{2,}')
+STOP_WORDS = frozenset(['하는', '있는', '가장', '통해', '대한', '것이', '내가', '나의', 'nan', 'None'])
+
+# 워크시트 이름 -> 컬럼 정의
+SHEETS = {
+    'subjects': COLS_SUBJECTS,
+    'activities': COLS_ACTIVITIES,
+    'books': COLS_BOOKS,
+    'questions': COLS_QUESTIONS,
+}
+
 
 # -----------------------------------------------------------------------------
 # 2. 데이터 핸들링
 # -----------------------------------------------------------------------------
+@st.cache_resource
+def _gs_conn():
+    """
+    구글 시트 연결 객체를 한 번만 생성하여 재사용합니다.
+    """
+    return st.connection("gsheets", type=GSheetsConnection)
+
+@st.cache_resource
+def _gs_spreadsheet():
+    """
+    서비스 계정으로 연결된 경우 gspread Spreadsheet 객체를 반환합니다.
+    (공개 시트 연결이라 gspread 클라이언트가 없으면 None)
+    """
+    # st-gsheets-connection 0.1.0 기준: 서비스 계정 연결(GSheetsServiceAccountClient)만
+    # gspread 클라이언트를 비공개 속성 _client에 보관함. 버전 변경으로 속성이 사라지면
+    # batchGet/append 경로가 꺼지고 시트별 conn.read로 대체되므로 업그레이드 시 확인 필요.
+    client = getattr(_gs_conn().client, "_client", None)
+    if client is None:
+        return None
+    if SHEET_URL.startswith("http"):
+        return client.open_by_url(SHEET_URL)
+    return client.open_by_key(SHEET_URL)
+
+def _prepare_sheet(df, worksheet_name, columns):
+    """
+    시트에서 읽은 원본 DataFrame을 앱에서 쓰는 형태로 정리합니다.
+    (헤더 공백 제거, 필수 컬럼 보충, 숫자 변환, 빈 행 삭제)
+    """
+    # [중요 수정] 컬럼명 공백 제거 (시트 헤더의 실수 방지)
+    df.columns = df.columns.str.strip()
+    
+    # 필수 컬럼이 없으면 생성 (데이터 없는 경우 대비)
+    for col in columns:
+        if col not in df.columns:
+            df[col] = pd.NA
+        
+    # 숫자 강제 변환 (데이터 타입 오류 방지)
+    # 반복되는 분류 값은 category로 변환 (빈 행은 분류 값도 비어 있으므로 삭제 전에 변환해도 무방)
+    if worksheet_name == 'subjects':
+        for col in ['NFC(탐구욕)', 'NCC(종결욕)']:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+        df['분야'] = df['분야'].astype('category')
+    elif worksheet_name == 'activities':
+        for col in ['nAch(성취)', 'nPow(권력)', 'nAff(친화)', '몰입도(Flow)']:
+            df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+        df['유형'] = df['유형'].astype('category')
+    elif worksheet_name == 'books':
+        if '통합적복잡성' in df.columns:
+            df['통합적복잡성'] = pd.to_numeric(df['통합적복잡성'], errors='coerce').fillna(0)
+
+    # 필수 컬럼만 순서대로 선택 (이미 같은 구성이면 복사하지 않음)
+    if list(df.columns) != columns:
+        df = df[columns]
+    
+    # 모든 컬럼이 비어있는 행만 삭제 (하나라도 데이터가 있으면 유지)
+    mask = df.notna().any(axis=1)
+    if not mask.all():
+        df = df.loc[mask]
+    return df
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _read_sheet(worksheet_name, columns):
+    """
+    구글 시트에서 워크시트 하나를 읽어 정리합니다. (5분 캐시, add_data 저장 시 초기화)
+    실패하면 예외를 그대로 올려 실패 결과가 캐시되지 않도록 합니다.
+    """
+    conn = _gs_conn()
+    try:
+        df = conn.read(worksheet=worksheet_name, ttl=0, spreadsheet=SHEET_URL)
+    except TypeError:
+        df = conn.read(worksheet=worksheet_name, ttl=0)
+    
+    return _prepare_sheet(df, worksheet_name, list(columns))
+
 def get_data(worksheet_name, columns):
     """
     구글 시트에서 데이터를 불러옵니다.
-    오류 발생 시 빈 데이터프레임을 반환하여 앱이 멈추지 않도록 합니다.
+    오류 발생 시 빈 데이터프레임을 반환하여 앱이 멈추지 않도록 합니다. (다음 실행 때 다시 시도)
     """
     try:
-        conn = st.connection("gsheets", type=GSheetsConnection)
-        try:
-            df = conn.read(worksheet=worksheet_name, ttl=0, spreadsheet=SHEET_URL)
-        except TypeError:
-            df = conn.read(worksheet=worksheet_name, ttl=0)
-        
-        # [중요 수정] 컬럼명 공백 제거 (시트 헤더의 실수 방지)
-        df.columns = df.columns.str.strip()
-        
-        # 필수 컬럼이 없으면 생성 (데이터 없는 경우 대비)
-        for col in columns:
-            if col not in df.columns:
-                df[col] = pd.NA
-            
-        # 숫자 강제 변환 (데이터 타입 오류 방지)
-        if worksheet_name == 'subjects':
-            for col in ['NFC(탐구욕)', 'NCC(종결욕)']:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-        elif worksheet_name == 'activities':
-            for col in ['nAch(성취)', 'nPow(권력)', 'nAff(친화)', '몰입도(Flow)']:
-                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
-        elif worksheet_name == 'books':
-            if '통합적복잡성' in df.columns:
-                df['통합적복잡성'] = pd.to_numeric(df['통합적복잡성'], errors='coerce').fillna(0)
-
-        # 모든 컬럼이 비어있는 행만 삭제 (하나라도 데이터가 있으면 유지)
-        return df[columns].dropna(how='all')
-        
-    except Exception as e:
+        return _read_sheet(worksheet_name, tuple(columns))
+    except Exception:
         # 에러 발생 시 빈 DataFrame 반환하여 앱 중단 방지
-        return pd.DataFrame(columns=columns)
+        return pd.DataFrame(columns=list(columns))
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _batch_read_sheets():
+    """
+    네 개의 워크시트를 batchGet 한 번으로 읽어 정리합니다. (5분 캐시)
+    서비스 계정 연결이 아니면 None, 요청이 실패하면 예외를 올려 실패 결과가 캐시되지 않도록 합니다.
+    """
+    spreadsheet = _gs_spreadsheet()
+    if spreadsheet is None:
+        return None
+    
+    # 기본 렌더링(FORMATTED_VALUE)으로 모든 셀을 문자열로 받음 (숫자 컬럼은 _prepare_sheet에서 변환)
+    res = spreadsheet.values_batch_get(list(SHEETS))
+    value_ranges = res.get('valueRanges', [])
+    if len(value_ranges) != len(SHEETS):
+        raise ValueError("batchGet 응답의 워크시트 수가 맞지 않습니다.")
+    
+    sheets = {}
+    for (worksheet_name, columns), value_range in zip(SHEETS.items(), value_ranges):
+        rows = value_range.get('values', [])
+        header = [str(h) for h in rows[0]] if rows else list(columns)
+        # 끝의 빈 칸은 응답에서 생략되므로 헤더 길이에 맞춰 채움 (완전히 빈 행은 제외)
+        body = [(row + [None] * len(header))[:len(header)]
+                for row in rows[1:] if any(v != '' for v in row)]
+        df = pd.DataFrame(body, columns=header).replace('', np.nan)
+        sheets[worksheet_name] = _prepare_sheet(df, worksheet_name, columns)
+    return sheets
+
+def load_all_sheets():
+    """
+    네 개의 워크시트를 batchGet 한 번으로 불러옵니다.
+    서비스 계정 연결이 아니거나 요청이 실패하면 None을 반환합니다. (get_data로 대체, 다음 실행 때 다시 시도)
+    """
+    try:
+        return _batch_read_sheets()
+    except Exception:
+        return None
 
 def add_data(worksheet_name, new_row_df, columns):
     """
-    새로운 데이터를 구글 시트에 추가합니다.
+    새로운 데이터를 구글 시트 맨 아래에 한 행으로 추가합니다.
+    (기존 데이터를 읽어 전체를 다시 쓰지 않고 values.append만 호출)
     """
     try:
-        conn = st.connection("gsheets", type=GSheetsConnection)
-        try:
-            existing_data = conn.read(worksheet=worksheet_name, ttl=0, spreadsheet=SHEET_URL)
-        except TypeError:
-            existing_data = conn.read(worksheet=worksheet_name, ttl=0)
+        spreadsheet = _gs_spreadsheet()
+        if spreadsheet is None:
+            raise RuntimeError("시트에 쓰려면 서비스 계정 연결이 필요합니다.")
+        worksheet = spreadsheet.worksheet(worksheet_name)
         
-        updated_data = pd.concat([existing_data, new_row_df], ignore_index=True)
+        # 헤더 행만 읽어 컬럼 순서 확인
+        header = [h.strip() for h in worksheet.row_values(1)]
         
-        try:
-            conn.update(worksheet=worksheet_name, data=updated_data, spreadsheet=SHEET_URL)
-        except TypeError:
-            conn.update(worksheet=worksheet_name, data=updated_data)
+        # 시트에 없는 컬럼은 헤더 끝에 추가 (헤더가 없으면 새로 생성)
+        missing = [c for c in columns if c not in header]
+        if missing:
+            header = header + missing
+            if len(header) > worksheet.col_count:
+                worksheet.add_cols(len(header) - worksheet.col_count)
+            worksheet.update(range_name='A1', values=[header])
+        
+        # 시트 헤더 순서에 맞춰 값 정렬
+        row = new_row_df.to_dict('records')[0]
+        values = ["" if pd.isna(row.get(h)) else row.get(h) for h in header]
+        
+        # 서버에서 위치를 정해 추가 (INSERT_ROWS라 동시 저장이나 중간의 빈 행이 있어도 기존 데이터를 덮어쓰지 않음)
+        worksheet.append_row(values, value_input_option='USER_ENTERED',
+                             insert_data_option='INSERT_ROWS', table_range='A1')
             
         st.cache_data.clear()
         return True
@@ -100,12 +208,64 @@ def add_data(worksheet_name, new_row_df, columns):
         st.error(f"저장 실패: {e}")
         return False
 
+@st.cache_data(show_spinner=False, max_entries=1)
+def _dist_matrix(X_bytes, shape):
+    """
+    모든 활동 쌍의 유클리드 거리를 한 번 계산하고, 행마다 가까운 순서의 인덱스를 반환합니다.
+    (각 행의 0번은 항상 자기 자신)
+    """
+    X = np.frombuffer(X_bytes, dtype=np.float32).reshape(shape)
+    dist = ((X[:, None, :] - X[None, :, :]) ** 2).sum(-1)
+    np.fill_diagonal(dist, -1)
+    return np.argsort(dist, axis=1, kind='stable')
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def _act_matrix(df):
+    """
+    kNN/PCA에 쓰는 활동 성향 점수(nAch, nPow, nAff)를 연속된 float32 배열로 반환합니다.
+    """
+    X = df[['nAch(성취)', 'nPow(권력)', 'nAff(친화)']].apply(pd.to_numeric, errors='coerce').fillna(0)
+    return np.ascontiguousarray(X.to_numpy(dtype=np.float32))
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _pca_model(arr_bytes, shape):
+    """
+    성향 점수로 2차원 PCA를 학습한 모델을 반환합니다. (데이터가 바뀔 때만 다시 학습)
+    st.cache_data.clear()로는 지워지지 않으므로 최신 데이터의 모델 하나만 보관합니다.
+    """
+    X = np.frombuffer(arr_bytes, dtype=np.float32).reshape(shape)
+    return PCA(n_components=2).fit(X)
+
+@st.cache_data(show_spinner=False, max_entries=1)
+def _norm_scores(arr_bytes, shape):
+    """
+    성향 점수를 열마다 0~1로 정규화합니다. (값이 모두 같으면 0.5)
+    """
+    X = np.frombuffer(arr_bytes, dtype=np.float64).reshape(shape)
+    mn = X.min(axis=0)
+    rng = X.max(axis=0) - mn
+    return np.where(rng == 0, 0.5, (X - mn) / np.where(rng == 0, 1, rng))
+
+@st.cache_data(show_spinner=False, max_entries=4)
+def _to_csv_bytes(df):
+    """
+    백업용 CSV 바이트를 만듭니다. (엑셀 호환을 위해 utf-8-sig, 데이터가 같으면 캐시 사용)
+    """
+    return df.to_csv(index=False).encode('utf-8-sig')
+
 # 데이터 로드
 with st.spinner('데이터를 불러오는 중...'):
-    df_subjects = get_data("subjects", COLS_SUBJECTS)
-    df_activities = get_data("activities", COLS_ACTIVITIES)
-    df_books = get_data("books", COLS_BOOKS)
-    df_questions = get_data("questions", COLS_QUESTIONS)
+    sheets = load_all_sheets()
+    if sheets is None:
+        # batchGet을 쓸 수 없으면 시트별 요청을 동시에 보냄 (스레드에 Streamlit 컨텍스트 연결)
+        with ThreadPoolExecutor(max_workers=len(SHEETS), initializer=add_script_run_ctx,
+                                initargs=(None, get_script_run_ctx())) as ex:
+            futs = {name: ex.submit(get_data, name, tuple(cols)) for name, cols in SHEETS.items()}
+        sheets = {name: fut.result() for name, fut in futs.items()}
+    df_subjects = sheets["subjects"]
+    df_activities = sheets["activities"]
+    df_books = sheets["books"]
+    df_questions = sheets["questions"]
 
 
 # -----------------------------------------------------------------------------
@@ -142,10 +302,10 @@ with st.sidebar:
     if st.button("CSV 다운로드"):
         now = datetime.now().strftime("%Y%m%d")
         
-        csv_sub = df_subjects.to_csv(index=False).encode('utf-8-sig') if not df_subjects.empty else b""
-        csv_act = df_activities.to_csv(index=False).encode('utf-8-sig') if not df_activities.empty else b""
-        csv_book = df_books.to_csv(index=False).encode('utf-8-sig') if not df_books.empty else b""
-        csv_quest = df_questions.to_csv(index=False).encode('utf-8-sig') if not df_questions.empty else b""
+        csv_sub = _to_csv_bytes(df_subjects) if not df_subjects.empty else b""
+        csv_act = _to_csv_bytes(df_activities) if not df_activities.empty else b""
+        csv_book = _to_csv_bytes(df_books) if not df_books.empty else b""
+        csv_quest = _to_csv_bytes(df_questions) if not df_questions.empty else b""
         
         c1, c2 = st.columns(2)
         with c1:
@@ -291,24 +451,16 @@ elif menu == "3. 패턴 찾기 (통계/시각화)":
             for c in cols:
                 act_df[c] = pd.to_numeric(act_df[c], errors='coerce').fillna(0)
             
-            # 정규화
-            for col in cols:
-                min_val = act_df[col].min()
-                max_val = act_df[col].max()
-                if pd.isna(min_val) or pd.isna(max_val) or (max_val - min_val == 0):
-                    act_df[f'{col}_norm'] = 0.5
-                else:
-                    act_df[f'{col}_norm'] = (act_df[col] - min_val) / (max_val - min_val)
+            # 정규화 (데이터가 바뀔 때만 다시 계산, 가중치 변경 시에는 캐시 사용)
+            X = act_df[cols].to_numpy(dtype=np.float64)
+            norm = _norm_scores(X.tobytes(), X.shape)
 
-            # 점수 계산
-            act_df['My_Score'] = (
-                (act_df['nAch(성취)_norm'] * w_ach) +
-                (act_df['nPow(권력)_norm'] * w_pow) +
-                (act_df['nAff(친화)_norm'] * w_aff) +
-                (act_df['몰입도(Flow)_norm'] * w_flow)
-            )
+            # 점수 계산 (cols 순서와 같은 순서의 가중치)
+            act_df['My_Score'] = norm @ np.array([w_ach, w_pow, w_aff, w_flow])
 
+            # 차트에 쓰는 컬럼만 남겨 전송량 축소
             top_df = act_df.sort_values('My_Score', ascending=True).tail(10)
+            top_df = top_df[['경험명', 'My_Score', '메모', 'nAch(성취)', 'nPow(권력)', 'nAff(친화)', '몰입도(Flow)']]
             
             fig_rank = px.bar(top_df, 
                               x='My_Score', y='경험명', orientation='h',
@@ -332,21 +484,15 @@ elif menu == "3. 패턴 찾기 (통계/시각화)":
         st.subheader("3. 메모 키워드 (Word Cloud)")
         
         # 메모 데이터 수집
-        texts = []
-        if not df_activities.empty: texts.extend(df_activities['메모'].dropna().astype(str).tolist())
-        if not df_subjects.empty: texts.extend(df_subjects['메모'].dropna().astype(str).tolist())
-        if not df_books.empty: texts.extend(df_books['의미부여'].dropna().astype(str).tolist())
+        texts = pd.concat([df_activities['메모'], df_subjects['메모'], df_books['의미부여']]).dropna().astype(str)
         
-        all_text = " ".join(texts)
-        
-        if all_text.strip():
-            words = re.findall(r'\w+', all_text)
-            stop_words = ['하는', '있는', '가장', '통해', '대한', '것이', '내가', '나의', '함', '음', '는', '은', '이', '가', '을', '를', 'nan', 'None']
-            words = [w for w in words if len(w) > 1 and w not in stop_words]
-            word_counts = Counter(words).most_common(30)
+        if texts.str.strip().ne('').any():
+            words = texts.str.findall(WORD_RE).explode().dropna()
+            words = words[~words.isin(STOP_WORDS)]
+            word_counts = words.value_counts().head(30)
             
-            if word_counts:
-                wc_df = pd.DataFrame(word_counts, columns=['Keyword', 'Count'])
+            if not word_counts.empty:
+                wc_df = word_counts.rename_axis('Keyword').reset_index(name='Count')
                 fig_tree = px.treemap(wc_df, path=['Keyword'], values='Count',
                                       color='Count', color_continuous_scale='Teal',
                                       title="자주 등장한 키워드 (Treemap)")
@@ -365,26 +511,21 @@ elif menu == "4. 연결 짓기 (유사 경험 찾기/kNN)":
     if len(df_activities) >= 3:
         try:
             act_df = df_activities.copy()
-            numeric_cols = ['nAch(성취)', 'nPow(권력)', 'nAff(친화)']
-            for c in numeric_cols:
-                act_df[c] = pd.to_numeric(act_df[c], errors='coerce').fillna(0)
+            X = _act_matrix(df_activities)
             
-            # PCA
-            pca = PCA(n_components=2)
-            components = pca.fit_transform(act_df[numeric_cols])
+            # PCA (학습은 캐시, 투영만 매번 수행)
+            components = _pca_model(X.tobytes(), X.shape).transform(X)
             act_df['x'] = components[:, 0]
             act_df['y'] = components[:, 1]
             act_df['Flow'] = pd.to_numeric(act_df['몰입도(Flow)'], errors='coerce').fillna(0)
 
             selected_act_name = st.selectbox("기준 경험 선택:", act_df['경험명'].tolist())
-            target_row = act_df[act_df['경험명'] == selected_act_name].iloc[0]
-            target_vec = target_row[numeric_cols].values.reshape(1, -1)
+            target_pos = int(np.flatnonzero(act_df['경험명'].to_numpy() == selected_act_name)[0])
+            target_row = act_df.iloc[target_pos]
             
-            # kNN
+            # kNN (거리 순서는 데이터가 바뀔 때만 다시 계산)
             n_neighbors = min(4, len(act_df))
-            knn = NearestNeighbors(n_neighbors=n_neighbors, metric='euclidean')
-            knn.fit(act_df[numeric_cols])
-            distances, indices = knn.kneighbors(target_vec)
+            sorted_idx = _dist_matrix(X.tobytes(), X.shape)
             
             col1, col2 = st.columns([2, 1])
             
@@ -394,7 +535,7 @@ elif menu == "4. 연결 짓기 (유사 경험 찾기/kNN)":
                 fig.add_trace(go.Scatter(
                     x=act_df['x'], y=act_df['y'], mode='markers+text',
                     marker=dict(size=act_df['Flow']*0.3 + 10, color=act_df['Flow'], colorscale='Bluered', showscale=True),
-                    text=act_df['경험명'], textposition="top center", name='All',
+                    text=act_df['경험명'].astype(str).str.slice(0, 12), textposition="top center", name='All',
                     hovertext=act_df['메모']
                 ))
                 # 선택된 점 (별표)
@@ -404,13 +545,17 @@ elif menu == "4. 연결 짓기 (유사 경험 찾기/kNN)":
                 ))
                 
                 # 이웃 연결선
-                neighbor_indices = indices[0][1:] # 0번은 자기 자신이므로 제외
+                neighbor_indices = sorted_idx[target_pos, 1:n_neighbors] # 0번은 자기 자신이므로 제외
+                # 모든 선을 NaN으로 구분한 하나의 trace로 그림
+                xs, ys = [], []
                 for idx in neighbor_indices:
                     neighbor = act_df.iloc[idx]
-                    fig.add_trace(go.Scatter(
-                        x=[target_row['x'], neighbor['x']], y=[target_row['y'], neighbor['y']],
-                        mode='lines', line=dict(color='gray', width=1, dash='dot'), showlegend=False
-                    ))
+                    xs += [target_row['x'], neighbor['x'], np.nan]
+                    ys += [target_row['y'], neighbor['y'], np.nan]
+                fig.add_trace(go.Scatter(
+                    x=xs, y=ys,
+                    mode='lines', line=dict(color='gray', width=1, dash='dot'), showlegend=False
+                ))
                 
                 fig.update_layout(title="경험 연결 지도 (Experience Constellation)", height=500, plot_bgcolor='rgba(0,0,0,0)')
                 st.plotly_chart(fig, use_container_width=True)
@@ -459,13 +604,11 @@ elif menu == "5. 글로 옮기기 (자소서 작성)":
         st.info(f"**Q. {selected_q_cat}**\n\n{target_q_row['내용']}")
         
         # 소재 선택 (Multiselect)
-        all_materials = []
-        if not df_activities.empty:
-            all_materials += [f"[활동] {row['경험명']}" for i, row in df_activities.iterrows()]
-        if not df_subjects.empty:
-            all_materials += [f"[과목] {row['경험명']}" for i, row in df_subjects.iterrows()]
-        if not df_books.empty:
-            all_materials += [f"[독서] {row['경험명']}" for i, row in df_books.iterrows()]
+        all_materials = (
+            ('[활동] ' + df_activities['경험명'].map(str)).tolist() +
+            ('[과목] ' + df_subjects['경험명'].map(str)).tolist() +
+            ('[독서] ' + df_books['경험명'].map(str)).tolist()
+        )
             
         selected_materials = st.multiselect("글감 소재 선택 (다중 선택 가능)", all_materials)
         
@@ -473,22 +616,26 @@ elif menu == "5. 글로 옮기기 (자소서 작성)":
         evidence_text = ""
         if selected_materials:
             st.markdown("##### 📌 선택된 소재 상세 정보 (참고용)")
+            # 경험명 -> 행 딕셔너리 (소재 목록과 같은 문자열 키 사용, 이름이 중복되면 첫 번째 행 사용)
+            act_by_name = df_activities.assign(_k=df_activities['경험명'].map(str)).drop_duplicates('_k').set_index('_k').to_dict('index')
+            sub_by_name = df_subjects.assign(_k=df_subjects['경험명'].map(str)).drop_duplicates('_k').set_index('_k').to_dict('index')
+            book_by_name = df_books.assign(_k=df_books['경험명'].map(str)).drop_duplicates('_k').set_index('_k').to_dict('index')
+            
             for item in selected_materials:
                 try:
                     # 대괄호 안의 타입과 이름 분리 "[활동] 이름"
-                    m_type_raw = item.split('] ')[0]
-                    m_name = item.split('] ')[1]
-                    m_type = m_type_raw.replace('[', '').replace(']', '')
+                    m_type_raw, m_name = item.split('] ', 1)
+                    m_type = m_type_raw.lstrip('[')
                     
                     detail = ""
                     if m_type == '활동':
-                        row = df_activities[df_activities['경험명'] == m_name].iloc[0]
+                        row = act_by_name[m_name]
                         detail = f"성취: {row['nAch(성취)']} | 몰입: {row['몰입도(Flow)']} | 메모: {row['메모']}"
                     elif m_type == '과목':
-                        row = df_subjects[df_subjects['경험명'] == m_name].iloc[0]
+                        row = sub_by_name[m_name]
                         detail = f"탐구: {row['NFC(탐구욕)']} | 종결: {row['NCC(종결욕)']} | 메모: {row['메모']}"
                     elif m_type == '독서':
-                        row = df_books[df_books['경험명'] == m_name].iloc[0]
+                        row = book_by_name[m_name]
                         detail = f"의미부여: {row['의미부여']}"
                     
                     st.caption(f"**{item}**: {detail}")